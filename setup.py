@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import os
+
 from setuptools import setup, find_packages
 
 with open("requirements.txt", "r") as f:
@@ -10,6 +12,21 @@ try:
 except FileNotFoundError:
     long_description = "Simpl-CLI: A simple wrapp CLI Awokwokwk"
 
+# Opt-in native build of the UI manager: SIMPL_CLI_MYPYC=1 pip install .
+# (needs mypy installed). The default install stays pure Python. Only
+# manager.py is compiled, so errors in the modules it imports are not fatal.
+ext_modules = []
+if os.environ.get("SIMPL_CLI_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(
+        [
+            "--follow-imports=silent",
+            "--ignore-missing-imports",
+            "simpl_cli/ui/manager.py",
+        ]
+    )
+
 setup(
     name="simpl-cli",
     version="0.0.0.2",
@@ -21,6 +38,7 @@ setup(
     packages=find_packages(),
     python_requires=">=3.8",
     install_requires=requirements,
+    ext_modules=ext_modules,
     entry_points={
         "console_scripts": [
             "simpl-cli=simpl_cli.cli:main",
@@ -14,6 +14,7 @@ class ContextManager:
     def __init__(self) -> None:
         self.shell_context: List[dict] = []
         self.conversation_history: List[dict] = []
+        self._ai_context: Optional[str] = None
 
     def add_shell_context(self, command: str, output: str) -> None:
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -25,11 +26,20 @@ class ContextManager:
             "epoch_time": datetime.now().timestamp(),
         }
         self.shell_context.append(context_entry)
+        self._ai_context = None
 
         if len(self.shell_context) > Config.MAX_SHELL_CONTEXT:
             self.shell_context.pop(0)
 
     def build_context_for_ai(self) -> str:
+        # Reused until the shell context changes, e.g. across chat turns with
+        # no shell activity in between. Planner steps always add an entry, so
+        # they re-render.
+        if self._ai_context is None:
+            self._ai_context = self._render_shell_context()
+        return self._ai_context
+
+    def _render_shell_context(self) -> str:
         if not self.shell_context:
             return ""
 
@@ -95,6 +105,7 @@ class ContextManager:
 
     def clear_context(self) -> None:
         self.shell_context = []
+        self._ai_context = None
 
     def clear_conversation(self) -> None:
         self.conversation_history = []
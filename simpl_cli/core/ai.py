@@ -4,6 +4,8 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Generator, Iterable, List, Optional
 
 import requests
@@ -14,6 +16,13 @@ from ..persona import PersonaSearchService, create_persona
 from .router import AdvancedRouter, RouterDecision, create_router
 
 
+# Warmup only needs the TCP/TLS handshake; a stalled HEAD must not hold up
+# the worker (or interpreter exit) for the full API timeout.
+_WARM_TIMEOUT = (3, 0.5)
+# Keep-alive sockets used this recently are assumed to still be open.
+_WARM_SKIP_SECONDS = 30.0
+
+
 class AIChatManager:
     def __init__(self, api_key: str, context_manager) -> None:
         self.api_key = api_key
@@ -27,6 +36,9 @@ class AIChatManager:
         self.search_service = PersonaSearchService()
         self.persona_memory: Dict[str, Dict] = {}
         self.command_executor = None
+        self._http = requests.Session()
+        self._last_http = 0.0
+        self._background = ThreadPoolExecutor(max_workers=3, thread_name_prefix="hybridshell-ai")
 
         if self.memory_enabled:
             try:
@@ -53,10 +65,20 @@ class AIChatManager:
 
     def prepare_interaction(self, user_message: str) -> Dict:
         diagnostics: List[str] = []
+        if self._needs_warmup():
+            self._background.submit(self._warm_connection)
+        # Shell context and memory lookups don't depend on the routing
+        # decision, so they run while the router call is in flight.
+        shell_context_future = self._background.submit(self.context_manager.build_context_for_ai)
+        memory_future = self._background.submit(self._retrieve_memory_snippets, user_message)
 
         decision = self._route(user_message, diagnostics)
         persona_name = decision.persona if decision else "general_chat"
-        persona_context = self._build_persona_context(user_message, decision)
+        persona_context = self._build_persona_context(
+            decision,
+            shell_context_future.result(),
+            memory_future.result(),
+        )
 
         persona = create_persona(persona_name, self)
         result = persona.process(user_message, persona_context)
@@ -73,6 +95,18 @@ class AIChatManager:
             "persona": persona_name,
         }
 
+    def _needs_warmup(self) -> bool:
+        return time.monotonic() - self._last_http >= _WARM_SKIP_SECONDS
+
+    def _warm_connection(self) -> None:
+        # Opens the TCP/TLS connection while routing runs so the completion
+        # request can reuse it from the session pool.
+        self._last_http = time.monotonic()
+        try:
+            self._http.head(Config.API_BASE_URL, timeout=_WARM_TIMEOUT)
+        except Exception:  # noqa: BLE001
+            pass
+
     def _route(self, user_message: str, diagnostics: List[str]) -> Optional[RouterDecision]:
         if not self.router_enabled:
             diagnostics.append("[yellow]Router disabled via configuration; defaulting to general_chat.[/yellow]")
@@ -102,10 +136,12 @@ class AIChatManager:
 
         return decision
 
-    def _build_persona_context(self, user_message: str, decision: Optional[RouterDecision]) -> Dict:
-        shell_context = self.context_manager.build_context_for_ai()
-        memory_snippets = self._retrieve_memory_snippets(user_message)
-
+    def _build_persona_context(
+        self,
+        decision: Optional[RouterDecision],
+        shell_context: str,
+        memory_snippets: List,
+    ) -> Dict:
         metadata_bundle = {
             "decision": decision,
             "query": decision.query if decision else None,
@@ -138,8 +174,9 @@ class AIChatManager:
             "Authorization": f"Bearer {self.api_key}",
         }
 
+        self._last_http = time.monotonic()
         try:
-            response = requests.post(
+            response = self._http.post(
                 Config.API_BASE_URL,
                 headers=headers,
                 data=json.dumps(payload),
@@ -149,29 +186,31 @@ class AIChatManager:
         except Exception as error:  # noqa: BLE001
             raise RuntimeError(f"Completion error: {error}") from error
 
-        data = response.json()
+        data = json.loads(response.content)
         choices = data.get("choices") or []
         if not choices:
             return ""
 
         return choices[0].get("message", {}).get("content", "")
 
-    def run_shell_command(self, command: str) -> Dict[str, str | int]:
+    def run_shell_command(self, command: str, argv: Optional[List[str]] = None) -> Dict[str, str | int]:
         shell_env = os.environ.copy()
         shell_kwargs = {}
         if os.name != "nt":
             shell_kwargs["executable"] = Config.get_shell()
 
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd(),
-                env=shell_env,
-                **shell_kwargs,
-            )
+            result = self._run_direct(argv, shell_env) if argv else None
+            if result is None:
+                result = subprocess.run(
+                    command,
+                    shell=True,
+                    capture_output=True,
+                    text=True,
+                    cwd=os.getcwd(),
+                    env=shell_env,
+                    **shell_kwargs,
+                )
         except Exception as error:  # noqa: BLE001
             output = f"Command error: {error}"
             self.context_manager.add_shell_context(command, output)
@@ -212,6 +251,20 @@ class AIChatManager:
             "stderr": stderr,
         }
 
+    @staticmethod
+    def _run_direct(argv: List[str], env: Dict[str, str]) -> Optional[subprocess.CompletedProcess]:
+        # Exec's a shell-free argv (no /bin/sh in between); returns None when
+        # the binary can't be exec'd (missing, not executable, ...) so the
+        # caller can fall back to the shell.
+        try:
+            result = subprocess.run(argv, capture_output=True, cwd=os.getcwd(), env=env)
+        except OSError:
+            return None
+
+        result.stdout = result.stdout.decode("utf-8", "replace")
+        result.stderr = result.stderr.decode("utf-8", "replace")
+        return result
+
     def create_stream(self, messages: List[dict]) -> Generator[str, None, None]:
         url = Config.API_BASE_URL
         payload = {
@@ -226,8 +279,9 @@ class AIChatManager:
             "Authorization": f"Bearer {self.api_key}",
         }
 
+        self._last_http = time.monotonic()
         try:
-            response = requests.post(
+            response = self._http.post(
                 url,
                 headers=headers,
                 data=json.dumps(payload),
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 from time import perf_counter
 
 from prompt_toolkit import PromptSession
@@ -18,6 +18,23 @@ from ..ui.theme import PanelTheme
 from .ai import AIChatManager
 
 
+_AI_SPECIAL_COMMANDS = {
+    "clear": "_show_clear_moved",
+    "clear0": "_show_clear_moved",
+    "context": "_show_context",
+    "resume": "resume_cancelled_stream",
+    "cancelstate": "_show_cancel_state",
+}
+
+_MEMORY_ACTIONS = {
+    "status": "_memory_status",
+    "clear": "_memory_clear",
+    "enable": "_memory_enable",
+    "disable": "_memory_disable",
+    "topk": "_memory_topk",
+}
+
+
 class HybridShell:
 
     def __init__(
@@ -142,18 +159,14 @@ class HybridShell:
         if seconds < 1:
             return f"{seconds * 1000:.0f}ms"
 
-        total_seconds = int(seconds)
-        minutes, secs = divmod(total_seconds, 60)
-        hours, minutes = divmod(minutes, 60)
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes, secs = divmod(remainder, 60)
 
-        parts = []
         if hours:
-            parts.append(f"{hours}h")
+            return f"{hours}h {minutes}m {secs}s" if minutes else f"{hours}h {secs}s"
         if minutes:
-            parts.append(f"{minutes}m")
-        parts.append(f"{secs}s")
-
-        return " ".join(parts)
+            return f"{minutes}m {secs}s"
+        return f"{secs}s"
 
     def resume_cancelled_stream(self):
         if not self.streaming_ui.has_cancelled_stream():
@@ -167,7 +180,7 @@ class HybridShell:
             return
 
         state_info = self.streaming_ui.get_cancelled_state_info()
-        user_message = state_info["user_message"]  # type: ignore[index]
+        user_message = state_info.user_message  # type: ignore[union-attr]
 
         self.console.print()
         self.console.print(
@@ -190,36 +203,37 @@ class HybridShell:
         return response
 
     def handle_ai_special_commands(self, user_input: str) -> bool:
-        lowered = user_input.lower()
-        if lowered in {"clear", "clear0"}:
+        handler_name = _AI_SPECIAL_COMMANDS.get(user_input.casefold())
+        if handler_name is None:
+            return False
+
+        getattr(self, handler_name)()
+        return True
+
+    def _show_clear_moved(self) -> None:
+        self.console.print(
+            PanelTheme.build(
+                "[yellow]Perintah 'clear' kini digantikan oleh '[bold]memory clear[/bold]' di mode shell.[/yellow]",
+                title="Memory",
+                style="warning",
+            )
+        )
+
+    def _show_context(self) -> None:
+        self.ui.show_context_table(self.context_manager.shell_context)
+
+    def _show_cancel_state(self) -> None:
+        if self.streaming_ui.has_cancelled_stream():
+            state_info = self.streaming_ui.get_cancelled_state_info()
+            self.ui.show_cancelled_stream_info(state_info)
+        else:
             self.console.print(
                 PanelTheme.build(
-                    "[yellow]Perintah 'clear' kini digantikan oleh '[bold]memory clear[/bold]' di mode shell.[/yellow]",
-                    title="Memory",
+                    "[yellow]No cancelled stream available[/yellow]",
+                    title="Cancel State",
                     style="warning",
                 )
             )
-            return True
-        if lowered == "context":
-            self.ui.show_context_table(self.context_manager.shell_context)
-            return True
-        if lowered == "resume":
-            self.resume_cancelled_stream()
-            return True
-        if lowered == "cancelstate":
-            if self.streaming_ui.has_cancelled_stream():
-                state_info = self.streaming_ui.get_cancelled_state_info()
-                self.ui.show_cancelled_stream_info(state_info)
-            else:
-                self.console.print(
-                    PanelTheme.build(
-                        "[yellow]No cancelled stream available[/yellow]",
-                        title="Cancel State",
-                        style="warning",
-                    )
-                )
-            return True
-        return False
 
     def handle_shell_special_commands(self, user_input: str) -> bool:  # noqa: D401
         normalized = user_input.strip()
@@ -237,50 +251,54 @@ class HybridShell:
         parts = command.split()
         action = parts[1] if len(parts) > 1 else "status"
 
-        if action == "status":
-            stats = self.ai_manager.get_memory_stats()
-            self.ui.display_memory_status(stats)
-            self.context_manager.add_shell_context(command, "Displayed memory status")
+        handler_name = _MEMORY_ACTIONS.get(action)
+        if handler_name is None:
+            self.ui.display_memory_error("Unknown memory command")
             return True
 
-        if action == "clear":
-            success = self.ai_manager.clear_memory()
-            if success:
-                self.context_manager.clear_all()
-            self.ui.display_memory_cleared(success)
-            status_msg = "Memory and context cleared" if success else "Memory clear failed"
-            self.context_manager.add_shell_context(command, status_msg)
-            return True
+        getattr(self, handler_name)(command, parts)
+        return True
 
-        if action == "enable":
-            enabled = self.ai_manager.set_memory_enabled(True)
-            self.ui.display_memory_toggle(enabled)
-            status_msg = "Memory enabled" if enabled else "Failed to enable memory"
-            self.context_manager.add_shell_context(command, status_msg)
-            return True
+    def _memory_status(self, command: str, parts: List[str]) -> None:
+        stats = self.ai_manager.get_memory_stats()
+        self.ui.display_memory_status(stats)
+        self.context_manager.add_shell_context(command, "Displayed memory status")
 
-        if action == "disable":
-            self.ai_manager.set_memory_enabled(False)
-            self.ui.display_memory_toggle(False)
-            self.context_manager.add_shell_context(command, "Memory disabled")
-            return True
+    def _memory_clear(self, command: str, parts: List[str]) -> None:
+        success = self.ai_manager.clear_memory()
+        if success:
+            self.context_manager.clear_all()
+        self.ui.display_memory_cleared(success)
+        status_msg = "Memory and context cleared" if success else "Memory clear failed"
+        self.context_manager.add_shell_context(command, status_msg)
+
+    def _memory_enable(self, command: str, parts: List[str]) -> None:
+        enabled = self.ai_manager.set_memory_enabled(True)
+        self.ui.display_memory_toggle(enabled)
+        status_msg = "Memory enabled" if enabled else "Failed to enable memory"
+        self.context_manager.add_shell_context(command, status_msg)
+
+    def _memory_disable(self, command: str, parts: List[str]) -> None:
+        self.ai_manager.set_memory_enabled(False)
+        self.ui.display_memory_toggle(False)
+        self.context_manager.add_shell_context(command, "Memory disabled")
+
+    def _memory_topk(self, command: str, parts: List[str]) -> None:
+        if len(parts) < 3:
+            self.ui.display_memory_error("Unknown memory command")
+            return
 
-        if action == "topk" and len(parts) >= 3:
-            try:
-                value = int(parts[2])
-            except ValueError:
-                self.ui.display_memory_error("Invalid top-k value")
-                return True
-
-            new_value = self.ai_manager.set_memory_top_k(value)
-            self.ui.display_memory_topk(new_value)
-            self.context_manager.add_shell_context(
-                command, f"Memory top_k set to {new_value}"
-            )
-            return True
+        try:
+            value = int(parts[2])
+        except ValueError:
+            self.ui.display_memory_error("Invalid top-k value")
+            return
 
-        self.ui.display_memory_error("Unknown memory command")
-        return True
+        new_value = self.ai_manager.set_memory_top_k(value)
+        self.ui.display_memory_topk(new_value)
+        self.context_manager.add_shell_context(
+            command, f"Memory top_k set to {new_value}"
+        )
 
     def run(self) -> None:
         self.ui.show_welcome()
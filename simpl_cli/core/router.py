@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from ..config import Config
 
 
@@ -25,6 +31,44 @@ NOTES:
 - Confidence range 0-1. No markdown, code fences, or extra keys.
 """
 
+# Router decisions are reused for identical (input, context) pairs.
+DECISION_CACHE_MAX = 512
+DECISION_CACHE_TTL = 900
+
+# Number of recent non-system messages shown to the router.
+CONTEXT_WINDOW = 8
+SNIPPET_MAX = 240
+
+_TRUNC_RE = re.compile(r".{1,%d}(?:\s|$)" % SNIPPET_MAX, re.S)
+
+
+def _snippet(content: str) -> str:
+    if len(content) <= SNIPPET_MAX:
+        return content
+    # Cut at the last word boundary; a single long token is hard-cut instead.
+    match = _TRUNC_RE.match(content)
+    head = match.group(0).rstrip() if match else content[:SNIPPET_MAX]
+    return head + "…"
+
+
+SEARCH_RESULT_MARKERS = (
+    "Source:",
+    "Sumber:",
+    "# Key Points",
+    "Web Page Summary",
+    "Address Analysis",
+    "```",
+)
+_SEARCH_MARKER_RE = re.compile("|".join(map(re.escape, SEARCH_RESULT_MARKERS)))
+
+# intent -> (persona, whether the router's suggested_query replaces the input)
+_INTENT_TABLE: Dict[str, Tuple[str, bool]] = {
+    "GENERAL_CHAT": ("general_chat", False),
+    "SEARCH_SERVICE": ("search_service", True),
+    "HELP_ASSISTENT": ("help_assistent", False),
+}
+_DEFAULT_INTENT = ("general_chat", False)
+
 
 @dataclass
 class RouterDecision:
@@ -36,16 +80,119 @@ class RouterDecision:
     previous_results: Optional[str] = None
 
 
+@dataclass
+class RouterResponse:
+    intent: str = "GENERAL_CHAT"
+    confidence: float = 0.5
+    reasoning: str = ""
+    suggested_query: str = ""
+
+
+def _decode_router_response(raw: str | bytes) -> Optional[RouterResponse]:
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    try:
+        return RouterResponse(
+            intent=str(data.get("intent") or "GENERAL_CHAT"),
+            confidence=float(data.get("confidence", 0.5)),
+            reasoning=str(data.get("reasoning") or ""),
+            suggested_query=str(data.get("suggested_query") or ""),
+        )
+    except (TypeError, ValueError):
+        return None
+
+
 class AdvancedRouter:
     def __init__(self, api_key: str) -> None:
         self.api_key = api_key
         self.last_search_context: Optional[str] = None
+        self._decision_cache: "OrderedDict[str, Tuple[float, str, RouterDecision]]" = OrderedDict()
+        self._window: Deque[Tuple[Dict, str, bool]] = deque(maxlen=CONTEXT_WINDOW)
+        self._has_search = 0
+
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                # urllib3 skips POST retries unless the method is allowed.
+                max_retries=Retry(
+                    total=1,
+                    backoff_factor=0.1,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=frozenset({"POST"}),
+                ),
+            ),
+        )
+        self._session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}",
+            }
+        )
+
+        self._payload_model: Optional[str] = None
+        self._payload_prefix = b""
+
+    def _get_payload_prefix(self) -> bytes:
+        # The model can be changed with `export` mid-session; re-encode then.
+        model = Config.get_router_model()
+        if model != self._payload_model:
+            self._payload_prefix = self._encode_payload_prefix(model)
+            self._payload_model = model
+        return self._payload_prefix
+
+    @staticmethod
+    def _encode_payload_prefix(model: str) -> bytes:
+        # Everything but the user message is fixed, so it is encoded once with
+        # "messages" last and left open for the per-call user entry.
+        static_payload = {
+            "model": model,
+            "stream": True,
+            "temperature": 0.0,
+            "top_p": 1,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a precise intent classifier. Always answer with JSON.",
+                },
+            ],
+        }
+        encoded = json.dumps(static_payload, separators=(",", ":")).encode("utf-8")
+        return encoded[: -len(b"]}")] + b","
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:  # noqa: BLE001
+            pass
 
     def route(self, user_input: str, conversation_history: List[Dict]) -> RouterDecision:
         context_text, has_search_results = self._extract_context(conversation_history)
+
+        cache_key = None
+        if not has_search_results:
+            cache_key = self._decision_cache_key(user_input, context_text)
+            cached = self._get_cached_decision(cache_key, user_input)
+            if cached is not None:
+                return cached
+
         decision = self._classify_intent(user_input, context_text, has_search_results)
 
         if decision and decision.confidence >= 0.6:
+            if cache_key is not None:
+                self._store_decision(cache_key, user_input, decision)
             return decision
 
         return RouterDecision(
@@ -55,36 +202,78 @@ class AdvancedRouter:
             reasoning="Fallback: router confidence too low",
         )
 
-    def _extract_context(self, messages: List[Dict]) -> Tuple[str, bool]:
-        if not messages:
-            return "", False
+    @staticmethod
+    def _decision_cache_key(user_input: str, context_text: str) -> str:
+        normalized = " ".join(user_input.lower().split())
+        context_digest = hashlib.blake2b(context_text.encode("utf-8"), digest_size=8).hexdigest()
+        return hashlib.sha256(f"{normalized}|{context_digest}".encode("utf-8")).hexdigest()
 
-        relevant = [msg for msg in messages if msg.get("role") != "system"][-8:]
-        parts: List[str] = []
-        has_search_results = False
-
-        for msg in relevant:
-            role = "User" if msg.get("role") == "user" else "Assistant"
-            content = msg.get("content") or ""
-
-            if msg.get("role") == "assistant" and any(
-                marker in content
-                for marker in (
-                    "Source:",
-                    "Sumber:",
-                    "# Key Points",
-                    "Web Page Summary",
-                    "Address Analysis",
-                    "```",
-                )
-            ):
-                has_search_results = True
-                self.last_search_context = content
-
-            snippet = content if len(content) <= 240 else f"{content[:240]}..."
-            parts.append(f"{role}: {snippet}")
-
-        return "\n".join(parts), has_search_results
+    def _get_cached_decision(self, key: str, user_input: str) -> Optional[RouterDecision]:
+        entry = self._decision_cache.get(key)
+        if entry is None:
+            return None
+
+        stored_at, stored_input, decision = entry
+        if time.monotonic() - stored_at > DECISION_CACHE_TTL:
+            del self._decision_cache[key]
+            return None
+
+        self._decision_cache.move_to_end(key)
+        if decision.query == stored_input and stored_input != user_input:
+            return replace(decision, query=user_input)
+        return decision
+
+    def _store_decision(self, key: str, user_input: str, decision: RouterDecision) -> None:
+        self._decision_cache[key] = (time.monotonic(), user_input, decision)
+        self._decision_cache.move_to_end(key)
+        while len(self._decision_cache) > DECISION_CACHE_MAX:
+            self._decision_cache.popitem(last=False)
+
+    def ingest(self, msg: Dict) -> None:
+        if msg.get("role") == "system":
+            return
+
+        if len(self._window) == self._window.maxlen:
+            self._evict_oldest()
+
+        content = msg.get("content") or ""
+        role = "User" if msg.get("role") == "user" else "Assistant"
+        has_markers = msg.get("role") == "assistant" and bool(_SEARCH_MARKER_RE.search(content))
+        if has_markers:
+            self._has_search += 1
+            self.last_search_context = content
+
+        self._window.append((msg, f"{role}: {_snippet(content)}", has_markers))
+
+    def _evict_oldest(self) -> None:
+        _, _, has_markers = self._window.popleft()
+        if has_markers:
+            self._has_search -= 1
+
+    def _sync_window(self, messages: List[Dict]) -> None:
+        tail: List[Dict] = []
+        for msg in reversed(messages):
+            if msg.get("role") != "system":
+                tail.append(msg)
+                if len(tail) == CONTEXT_WINDOW:
+                    break
+        tail.reverse()
+
+        window = [entry[0] for entry in self._window]
+        overlap = min(len(window), len(tail))
+        while overlap and not all(
+            window[len(window) - overlap + i] is tail[i] for i in range(overlap)
+        ):
+            overlap -= 1
+
+        for _ in range(len(window) - overlap):
+            self._evict_oldest()
+        for msg in tail[overlap:]:
+            self.ingest(msg)
+
+    def _extract_context(self, messages: List[Dict]) -> Tuple[str, bool]:
+        self._sync_window(messages or [])
+        return "\n".join(line for _, line, _ in self._window), self._has_search > 0
 
     def _classify_intent(
         self,
@@ -98,39 +287,18 @@ class AdvancedRouter:
         if not response:
             return None
 
-        try:
-            data = json.loads(response)
-        except json.JSONDecodeError:
+        data = _decode_router_response(response)
+        if data is None:
             return None
 
-        intent = data.get("intent", "GENERAL_CHAT")
-        confidence = float(data.get("confidence", 0.5))
-        reasoning = data.get("reasoning", "")
-        suggested_query = data.get("suggested_query", user_input)
-
-        tool_map = {
-            "SEARCH_SERVICE": "search_service",
-            "GENERAL_CHAT": "general_chat",
-            "HELP_ASSISTENT": "help_assistent",
-        }
-        use_context = False
-        previous_results = None
-        query = suggested_query.strip() or user_input
-
-        if intent == "GENERAL_CHAT":
-            query = user_input
-        elif intent == "SEARCH_SERVICE":
-            query = suggested_query.strip() or user_input
-        elif intent == "HELP_ASSISTENT":
-            query = user_input
+        persona, use_suggested = _INTENT_TABLE.get(data.intent, _DEFAULT_INTENT)
+        query = (data.suggested_query.strip() or user_input) if use_suggested else user_input
 
         return RouterDecision(
-            persona=tool_map.get(intent, "general_chat"),
+            persona=persona,
             query=query,
-            confidence=confidence,
-            reasoning=reasoning,
-            use_context=use_context,
-            previous_results=previous_results,
+            confidence=data.confidence,
+            reasoning=data.reasoning,
         )
 
     def _build_prompt(self, user_input: str, context: str) -> str:
@@ -142,31 +310,20 @@ class AdvancedRouter:
         )
 
     def _call_router_model(self, prompt: str) -> Optional[str]:
-        payload = {
-            "model": Config.get_router_model(),
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a precise intent classifier. Always answer with JSON.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "stream": False,
-            "temperature": 0.0,
-            "top_p": 1,
-            "response_format": {"type": "json_object"},
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
+        body = b"".join(
+            (
+                self._get_payload_prefix(),
+                json.dumps({"role": "user", "content": prompt}, separators=(",", ":")).encode("utf-8"),
+                b"]}",
+            )
+        )
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 Config.API_BASE_URL,
-                headers=headers,
-                data=json.dumps(payload),
+                headers={"Accept": "text/event-stream"},
+                data=body,
+                stream=True,
                 timeout=Config.API_TIMEOUT,
             )
             response.raise_for_status()
@@ -174,16 +331,92 @@ class AdvancedRouter:
             return None
 
         try:
-            json_data = response.json()
-        except ValueError:
+            return self._read_router_stream(response)
+        except Exception:  # noqa: BLE001
             return None
+        finally:
+            response.close()
 
-        choices = json_data.get("choices") or []
-        if not choices:
-            return None
+    @staticmethod
+    def _read_router_stream(response) -> Optional[str]:
+        # Endpoints that ignore "stream" answer with a single JSON body.
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            return _message_content(json.loads(response.content))
 
-        message = choices[0].get("message", {})
-        return message.get("content")
+        parts: List[str] = []
+        scanner = _JsonObjectScanner()
+
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+
+            # The space after "data:" is optional in SSE.
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+
+            choices = chunk.get("choices") if isinstance(chunk, dict) else None
+            if not choices:
+                continue
+
+            content = (choices[0].get("delta") or {}).get("content")
+            if not content:
+                continue
+
+            parts.append(content)
+            if scanner.feed(content):
+                # The classifier has closed its JSON object; stop reading.
+                return "".join(parts)
+
+        # The stream ended before the object closed, so it cannot decode.
+        return None
+
+
+def _message_content(data: object) -> Optional[str]:
+    if not isinstance(data, dict):
+        return None
+
+    choices = data.get("choices") or []
+    if not choices:
+        return None
+
+    message = choices[0].get("message", {})
+    return message.get("content")
+
+
+class _JsonObjectScanner:
+    """Tracks brace depth over streamed text to spot the end of a JSON object."""
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> bool:
+        for char in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+                self.started = True
+            elif char == "}":
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    return True
+        return False
 
 
 def create_router(api_key: str) -> AdvancedRouter:
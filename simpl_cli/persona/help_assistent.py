@@ -1,21 +1,19 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations 
+import hashlib
 import json
 import os
 import shlex
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
 from ..config import Config
 from ..ui.theme import PanelTheme
 
-from rich.tree import Tree
-
-try:  # pragma: no-cover - graceful fallback jika InquirerPy tidak tersedia
-    from InquirerPy import inquirer
-except Exception:  # noqa: BLE001
-    inquirer = None
+if TYPE_CHECKING:
+    from rich.tree import Tree
 
 from .base import BasePersona, PersonaResult
 
@@ -28,7 +26,7 @@ class PlanStep:
     interactive: bool = False
 
 
-READ_ONLY_COMMANDS = {
+READ_ONLY_COMMANDS = frozenset({
     "ls",
     "pwd",
     "cat",
@@ -44,19 +42,106 @@ READ_ONLY_COMMANDS = {
     "tree",
     "bat",
     "batcat",
+})
+
+# Commands containing any of these are tokenized with shlex instead of str.split.
+_SHELL_QUOTING_CHARS = frozenset("\"'\\$")
+
+# Commands containing any of these need a shell to expand or redirect them.
+_SHELL_META_CHARS = frozenset("|&;<>()$`*?[]{}~#!\"'\\\n")
+
+# status key -> (tree label, feedback panel style, feedback status text)
+_STATUS_LABELS: Dict[Tuple, Tuple[str, str, str]] = {
+    ("executed", True, False): ("[green]Executed[/green]", "success", "Executed"),
+    ("executed", True, True): ("[yellow]Executed with warnings[/yellow]", "warning", "Executed (warnings)"),
+    ("executed", False, False): ("[red]Failed[/red]", "error", "Failed"),
+    ("executed", False, True): ("[red]Failed[/red]", "error", "Failed"),
+    ("invalid",): ("[red]Invalid command[/red]", "error", "Invalid"),
+    ("skipped",): ("[yellow]Skipped[/yellow]", "warning", "Skipped"),
 }
 
 
+def _status_labels(record: Dict) -> Tuple[str, str, str]:
+    status = record.get("status", "skipped")
+    if status == "executed":
+        key: Tuple = (status, record.get("exit_code") == 0, bool(record.get("stderr")))
+    else:
+        key = (status,)
+    return _STATUS_LABELS.get(key, _STATUS_LABELS[("skipped",)])
+
+
+_INTERACTIVE_LIST_STR = ", ".join(sorted(Config.INTERACTIVE_COMMANDS))
+_INTERACTIVE_SET = frozenset(command.lower() for command in Config.INTERACTIVE_COMMANDS)
+
+# Stdout at least this long is sent to the model only once per prompt.
+DEDUPE_STDOUT_MIN = 200
+
+
+# Positions whose stdout recurs later -> pointer to the latest step with it.
+def _repeated_stdout(executions: List[Dict]) -> Dict[int, str]:
+    latest: Dict[bytes, int] = {}
+    digests: List[Optional[bytes]] = []
+    for position, record in enumerate(executions):
+        stdout = (record.get("stdout") or "").strip()
+        if len(stdout) < DEDUPE_STDOUT_MIN:
+            digests.append(None)
+            continue
+        digest = hashlib.blake2b(stdout.encode("utf-8", "replace"), digest_size=8).digest()
+        digests.append(digest)
+        latest[digest] = position
+
+    repeated: Dict[int, str] = {}
+    for position, digest in enumerate(digests):
+        if digest is not None and latest[digest] != position:
+            step = executions[latest[digest]].get("step")
+            repeated[position] = f"[Content repeated in step {step}]"
+    return repeated
+
+
+# Planner replies keyed by a digest of the exact prompt messages.
+PLAN_CACHE_MAX = 256
+_PLAN_CACHE: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _plan_cache_key(messages: List[dict]) -> str:
+    encoded = json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _remember_plan(key: str, plan_text: str) -> None:
+    _PLAN_CACHE[key] = plan_text
+    _PLAN_CACHE.move_to_end(key)
+    while len(_PLAN_CACHE) > PLAN_CACHE_MAX:
+        _PLAN_CACHE.popitem(last=False)
+
+
+# Marks the InquirerPy import as not attempted yet (None means unavailable).
+_NOT_LOADED = object()
+
+
 class HelpAssistentPersona(BasePersona):
     name = "help_assistent"
+    _inquirer_cache = _NOT_LOADED
+
+    @classmethod
+    def _load_inquirer(cls):
+        if cls._inquirer_cache is _NOT_LOADED:
+            try:  # pragma: no-cover - graceful fallback jika InquirerPy tidak tersedia
+                from InquirerPy import inquirer
+            except Exception:  # noqa: BLE001
+                inquirer = None
+            cls._inquirer_cache = inquirer
+        return cls._inquirer_cache
 
     def process(self, user_message: str, context: Dict) -> PersonaResult:
         executed_steps: List[PlanStep] = []
         executions: List[Dict] = []
         context_state = dict(context)
+        # The planner is told not to cd, so the directory is fixed for this call.
+        context_state["_cwd"] = os.getcwd()
         avoid_interactive = False
         max_iterations = 10
-        executed_commands: List[str] = []
+        executed_commands: Set[str] = set()
         executor = getattr(self.ai_manager, "command_executor", None)
         status = None
 
@@ -90,8 +175,8 @@ class HelpAssistentPersona(BasePersona):
                 if step.interactive:
                     avoid_interactive = True
 
-                repeated_command = step.command.strip() in executed_commands
-                if repeated_command:
+                command_key = step.command.strip()
+                if command_key in executed_commands:
                     executions.append(
                         {
                             "step": len(executed_steps) + 1,
@@ -105,18 +190,19 @@ class HelpAssistentPersona(BasePersona):
                             "summary": "Skipped repeated command to avoid redundant loop.",
                         }
                     )
+                    self._annotate_record(executions[-1])
                     break
 
                 record = self._execute_single_step(len(executed_steps) + 1, step)
                 executed_steps.append(step)
                 executions.append(record)
-                executed_commands.append(step.command.strip())
-
-                context_state["shell_context"] = self.ai_manager.context_manager.build_context_for_ai()
+                executed_commands.add(command_key)
 
                 if record.get("status") in {"skipped", "invalid"}:
                     break
 
+                context_state["shell_context"] = self.ai_manager.context_manager.build_context_for_ai()
+
             if not executed_steps:
                 executed_steps = self._default_plan()
                 executions = [
@@ -164,7 +250,7 @@ class HelpAssistentPersona(BasePersona):
         sanitized_plan: List[PlanStep] = []
         enforce_non_interactive = avoid_interactive
 
-        for _ in range(2):
+        for attempt in range(2):
             messages = self._build_plan_messages(
                 user_message,
                 context,
@@ -172,8 +258,13 @@ class HelpAssistentPersona(BasePersona):
                 executions,
             )
 
+            # A retry must reach the model; the cache only serves first attempts.
+            cache_key = _plan_cache_key(messages)
+            plan_text = _PLAN_CACHE.get(cache_key) if attempt == 0 else None
+
             try:
-                plan_text = self.ai_manager.complete(messages, max_tokens=600)
+                if plan_text is None:
+                    plan_text = self.ai_manager.complete(messages, max_tokens=600)
                 plan_data = json.loads(plan_text)
             except Exception:
                 continue
@@ -183,6 +274,8 @@ class HelpAssistentPersona(BasePersona):
             if not plan_steps:
                 continue
 
+            _remember_plan(cache_key, plan_text)
+
             if enforce_non_interactive or not self._contains_interactive_commands(plan_steps):
                 sanitized_plan = plan_steps
                 break
@@ -201,10 +294,9 @@ class HelpAssistentPersona(BasePersona):
     ) -> List[dict]:
         shell_context = context.get("shell_context") or ""
 
-        interactive_list = ", ".join(sorted(Config.INTERACTIVE_COMMANDS))
         extra_instruction = (
             " Avoid the following interactive commands: "
-            f"{interactive_list}. Use non-interactive alternatives such as cat <<'EOF' > file."
+            f"{_INTERACTIVE_LIST_STR}. Use non-interactive alternatives such as cat <<'EOF' > file."
         ) if avoid_interactive else ""
 
         instructions = (
@@ -224,9 +316,10 @@ class HelpAssistentPersona(BasePersona):
 
         history_text = self._format_execution_history(executions)
 
+        # Most stable parts first and the shell context last, so repeated
+        # planner prompts share the longest possible prefix.
         user_prompt = [
-            f"Current working directory: {os.getcwd()}",
-            f"Recent shell context (if any):\n{shell_context}",
+            f"Current working directory: {context.get('_cwd') or os.getcwd()}",
             f"User request: {user_message}",
             "Provide the next shell step (or [] if done).",
         ]
@@ -235,6 +328,8 @@ class HelpAssistentPersona(BasePersona):
             user_prompt.append("Recent step summaries:")
             user_prompt.append(history_text)
 
+        user_prompt.append(f"Recent shell context (if any):\n{shell_context}")
+
         return [
             {"role": "system", "content": instructions},
             {
@@ -247,24 +342,18 @@ class HelpAssistentPersona(BasePersona):
         if not executions:
             return ""
 
+        recent = executions[-3:]
+        repeated = _repeated_stdout(recent)
         lines: List[str] = []
-        for record in executions[-3:]:
-            step_no = record.get("step")
-            description = record.get("description", "")
-            status = record.get("status", "unknown")
-            exit_code = record.get("exit_code")
-            summary = record.get("summary") or "(no output captured)"
+        for position, record in enumerate(recent):
+            if position in repeated:
+                summary = self._summarize_execution({**record, "stdout": repeated[position]})
+            else:
+                summary = record.get("summary") or "(no output captured)"
             lines.append(
-                "\n".join(
-                    filter(
-                        None,
-                        [
-                            f"Step {step_no}: {description}",
-                            f"Status: {status} (exit={exit_code})",
-                            summary,
-                        ],
-                    )
-                )
+                f"Step {record.get('step')}: {record.get('description', '')}\n"
+                f"Status: {record.get('status', 'unknown')} (exit={record.get('exit_code')})\n"
+                f"{summary}"
             )
 
         return "\n\n".join(lines)
@@ -296,18 +385,13 @@ class HelpAssistentPersona(BasePersona):
         return any(step.interactive for step in plan_steps)
 
     def _is_interactive_command(self, command: str) -> bool:
-        if not command:
-            return False
-
-        base = command.strip().split()[0].lower()
-        if base in Config.INTERACTIVE_COMMANDS:
-            return True
-
-        return False
+        head = command.split(None, 1) if command else []
+        return bool(head) and head[0].lower() in _INTERACTIVE_SET
 
     def _confirm_step(self, index: int, step: PlanStep) -> bool:
         default_choice = "execute" if step.confirm else "skip"
 
+        inquirer = self._load_inquirer()
         if inquirer is None:
             return default_choice == "execute"
 
@@ -353,8 +437,7 @@ class HelpAssistentPersona(BasePersona):
                 "interactive": step.interactive,
                 "summary": "Command missing.",
             }
-            self._display_step_feedback(step, record)
-            return record
+            return self._finish_record(step, record)
 
         auto_execute = (not step.interactive) and self._is_read_only_command(command)
 
@@ -375,11 +458,10 @@ class HelpAssistentPersona(BasePersona):
                 "interactive": step.interactive,
                 "summary": "Step skipped by user.",
             }
-            self._display_step_feedback(step, record)
-            return record
+            return self._finish_record(step, record)
 
         try:
-            result = self.ai_manager.run_shell_command(step.command)
+            result = self.ai_manager.run_shell_command(step.command, argv=self._direct_argv(step.command))
         except Exception as error:  # noqa: BLE001
             result = {
                 "command": step.command,
@@ -392,9 +474,21 @@ class HelpAssistentPersona(BasePersona):
         if auto_execute:
             record["auto_executed"] = True
         record["summary"] = self._summarize_execution(record)
+        return self._finish_record(step, record)
+
+    def _finish_record(self, step: PlanStep, record: Dict) -> Dict:
+        self._annotate_record(record)
         self._display_step_feedback(step, record)
         return record
 
+    def _annotate_record(self, record: Dict) -> None:
+        record["status_label"] = _status_labels(record)[0]
+        if record.get("status") == "executed":
+            preview_source = record.get("stdout", "") + record.get("stderr", "")
+            record["preview"] = self._truncate(preview_source or f"Exit code {record.get('exit_code')}")
+        else:
+            record["preview"] = ""
+
     def _build_final_messages(
         self,
         user_message: str,
@@ -412,26 +506,21 @@ class HelpAssistentPersona(BasePersona):
         if supplemental:
             system_msg += f"\nSupplemental information:\n{supplemental}"
 
-        plan_lines = []
-        for exec_info in executions:
-            status = exec_info.get("status", "")
-            exit_code = exec_info.get("exit_code")
-            stdout = self._truncate(exec_info.get("stdout", ""))
-            stderr = self._truncate(exec_info.get("stderr", ""))
-            plan_lines.append(
-                "\n".join(
-                    filter(
-                        None,
-                        [
-                            f"Step {exec_info.get('step')}: {exec_info.get('description')}",
-                            f"Command: {exec_info.get('command')}",
-                            f"Status: {status} (exit={exit_code})",
-                            f"Stdout: {stdout}" if stdout else None,
-                            f"Stderr: {stderr}" if stderr else None,
-                        ],
-                    )
-                )
+        repeated = _repeated_stdout(executions)
+        plan_lines: List[str] = []
+        for position, exec_info in enumerate(executions):
+            entry = (
+                f"Step {exec_info.get('step')}: {exec_info.get('description')}\n"
+                f"Command: {exec_info.get('command')}\n"
+                f"Status: {exec_info.get('status', '')} (exit={exec_info.get('exit_code')})"
             )
+            stdout = repeated.get(position) or self._truncate(exec_info.get("stdout", ""))
+            if stdout:
+                entry += f"\nStdout: {stdout}"
+            stderr = self._truncate(exec_info.get("stderr", ""))
+            if stderr:
+                entry += f"\nStderr: {stderr}"
+            plan_lines.append(entry)
 
         plan_summary = "\n---\n".join(plan_lines) if plan_lines else "(no steps executed)"
 
@@ -503,11 +592,17 @@ class HelpAssistentPersona(BasePersona):
         return " | ".join(parts)
 
     def _is_read_only_command(self, command: str) -> bool:
-        try:
-            tokens = shlex.split(command)
-        except ValueError:
-            return False
+        if _SHELL_QUOTING_CHARS.isdisjoint(command):
+            tokens = command.split()
+        else:
+            try:
+                tokens = shlex.split(command)
+            except ValueError:
+                return False
+
+        return self._is_read_only_tokens(tokens)
 
+    def _is_read_only_tokens(self, tokens: List[str]) -> bool:
         if not tokens:
             return False
 
@@ -520,7 +615,15 @@ class HelpAssistentPersona(BasePersona):
 
         return False
 
+    def _direct_argv(self, command: str) -> Optional[List[str]]:
+        if not _SHELL_META_CHARS.isdisjoint(command):
+            return None
+        tokens = command.split()
+        return tokens if self._is_read_only_tokens(tokens) else None
+
     def _build_plan_tree(self, plan_steps: List[PlanStep], executions: List[Dict]) -> Tree:
+        from rich.tree import Tree
+
         tree = Tree("[bold blue]Planner (Help Assistent Persona)[/bold blue]")
 
         execution_lookup = {exec_info.get("step"): exec_info for exec_info in executions if exec_info}
@@ -528,27 +631,14 @@ class HelpAssistentPersona(BasePersona):
         for index, step in enumerate(plan_steps, start=1):
             exec_info = execution_lookup.get(index, {})
             status = exec_info.get("status", "skipped")
-            exit_code = exec_info.get("exit_code")
-            stdout = exec_info.get("stdout", "")
-            stderr = exec_info.get("stderr", "")
+            status_label = exec_info.get("status_label") or _status_labels(exec_info)[0]
+            output_preview = exec_info.get("preview", "")
 
             if status == "executed":
-                if exit_code == 0 and not stderr:
-                    status_label = "[green]Executed[/green]"
-                elif exit_code == 0:
-                    status_label = "[yellow]Executed with warnings[/yellow]"
-                else:
-                    status_label = "[red]Failed[/red]"
-                preview_source = (stdout or "") + (stderr or "")
-                output_preview = self._truncate(preview_source or f"Exit code {exit_code}")
-                reason = f"Exit code {exit_code}"
+                reason = f"Exit code {exec_info.get('exit_code')}"
             elif status == "invalid":
-                status_label = "[red]Invalid command[/red]"
-                output_preview = ""
                 reason = "Empty command"
             else:
-                status_label = "[yellow]Skipped[/yellow]"
-                output_preview = ""
                 reason = exec_info.get("stderr", "User skipped")
 
             if step.interactive:
@@ -574,18 +664,9 @@ class HelpAssistentPersona(BasePersona):
         exit_code = record.get("exit_code")
         stdout = record.get("stdout", "") or ""
         stderr = record.get("stderr", "") or ""
+        _, panel_style, status_label = _status_labels(record)
 
         if status == "executed":
-            if exit_code == 0 and not stderr:
-                panel_style = "success"
-                status_label = "Executed"
-            elif exit_code == 0:
-                panel_style = "warning"
-                status_label = "Executed (warnings)"
-            else:
-                panel_style = "error"
-                status_label = "Failed"
-
             body_lines = [
                 f"[dim]Command:[/dim] {step.command}",
                 f"Status: {status_label} (exit={exit_code})",
@@ -594,19 +675,12 @@ class HelpAssistentPersona(BasePersona):
                 body_lines.append(f"Stdout:\n{self._truncate(stdout)}")
             if stderr.strip():
                 body_lines.append(f"Stderr:\n{self._truncate(stderr)}")
-        elif status == "skipped":
-            panel_style = "warning"
-            body_lines = [
-                f"[dim]Command:[/dim] {step.command}",
-                "Status: Skipped",
-                f"Reason: {stderr or 'User skipped'}",
-            ]
         else:
-            panel_style = "error"
+            fallback_reason = "User skipped" if status == "skipped" else "Invalid command"
             body_lines = [
                 f"[dim]Command:[/dim] {step.command}",
-                "Status: Invalid",
-                f"Reason: {stderr or 'Invalid command'}",
+                f"Status: {status_label}",
+                f"Reason: {stderr or fallback_reason}",
             ]
 
         if step.interactive:
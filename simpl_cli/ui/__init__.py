@@ -1,5 +1,6 @@
 from .manager import UIManager
 from .streaming import (
+    CancelledStreamState,
     LiveMarkdownStreamRenderer,
     StreamingContentRenderer,
     StreamingUIManager,
@@ -7,6 +8,7 @@ from .streaming import (
 
 __all__ = [
     "UIManager",
+    "CancelledStreamState",
     "LiveMarkdownStreamRenderer",
     "StreamingContentRenderer",
     "StreamingUIManager",
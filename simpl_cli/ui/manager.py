@@ -1,31 +1,30 @@
 #!/usr/bin/env python3
 from __future__ import annotations
+import hashlib
 import os
+import re
+import stat
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List
+from functools import lru_cache, wraps
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
 
 from prompt_toolkit.application import get_app
 from prompt_toolkit.formatted_text import (
     FormattedText,
     HTML,
     fragment_list_width,
-    merge_formatted_text,
     to_formatted_text,
 )
 from prompt_toolkit.styles import Style
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
 from rich.align import Align
-from rich.console import Console, Group
-from rich.markdown import Markdown
+from rich.console import Console, Group, RenderableType
 from rich.panel import Panel
-from rich.progress import (
-    BarColumn,
-    MofNCompleteColumn,
-    Progress,
-    SpinnerColumn,
-    TaskProgressColumn,
-    TextColumn,
-    TimeElapsedColumn,
-)
 from rich.status import Status
 from rich.syntax import Syntax
 from rich.table import Table
@@ -37,82 +36,274 @@ from ..environment import (
     get_all_env_info,
     get_prompt_env_indicators,
 )
+from .streaming import CancelledStreamState
 from .theme import PanelTheme
 
+# Markdown (markdown-it) and progress bars are loaded on first use.
+if TYPE_CHECKING:
+    import subprocess
+
+    from prompt_toolkit.formatted_text import OneStyleAndTextTuple
+    from pygments.lexer import Lexer
+    from rich.markdown import Markdown
+    from rich.progress import Progress, TaskID
+
+
+# Parsed prompt fragments only depend on their inputs, so each distinct
+# (icon, path) and (mode, env indicators) combination is parsed once.
+@lru_cache(maxsize=256)
+def _top_left_fragments(os_icon: str, path_display: str) -> Tuple[OneStyleAndTextTuple, ...]:
+    top_left_str = (
+        "<prompt_border>╭─</prompt_border> "
+        f"<prompt_os>{os_icon}</prompt_os> "
+        "<prompt_folder></prompt_folder> "
+        f"<path>{path_display}</path>"
+    )
+    return tuple(to_formatted_text(HTML(top_left_str)))
+
+
+@lru_cache(maxsize=256)
+def _env_fragments(
+    ai_mode: bool,
+    indicators: Tuple[Tuple[str, str], ...],
+) -> Tuple[OneStyleAndTextTuple, ...]:
+    env_segments = []
+    if ai_mode:
+        env_segments.append("<mode_ai>AI</mode_ai>")
+    for style_name, text in indicators:
+        tag = style_name.split(":", 1)[1] if style_name.startswith("class:") else style_name
+        env_segments.append(f"<{tag}>{text}</{tag}>")
+
+    if not env_segments:
+        return ()
+    return tuple(to_formatted_text(HTML(" " + " ".join(env_segments))))
+
+
+_PROMPT_TAIL_FT = (
+    ("", "\n"),
+    *to_formatted_text(HTML("<prompt_border>╰─</prompt_border>")),
+    *to_formatted_text(HTML("<prompt_symbol>❯</prompt_symbol> ")),
+)
 
-class UIManager:
+
+_ENVIRONMENT_STYLES = {
+    "env_python": "#99d1db bold",
+    "env_git": "#ef9f76 bold",
+    "env_node": "#cba6f7 bold",
+    "env_docker": "#81c8be bold",
+    "env_system": "#e5c890 bold",
+}
+
+_CANCELLED_PREFIX = "[cyan]Cancelled Stream Details:[/cyan]\n\n[bold]Original Question:[/bold] "
+_CANCELLED_MID1 = "\n[bold]Partial Words:[/bold] "
+_CANCELLED_MID2 = "\n[bold]Cancelled At:[/bold] "
+
+_ACTIONS_TEXT = Text.from_markup("""
+[green]Available Actions:[/green]
+• [bold]resume[/bold] - Continue from where it stopped
+• [bold]Alt+Z[/bold] - Quick resume via keybinding
+• [bold]clear[/bold] - Clear this cancelled state""")
+
+
+@lru_cache(maxsize=256)
+def _iso_to_hms(timestamp: str) -> str:
+    # isoformat() output already carries HH:MM:SS at a fixed offset.
+    if len(timestamp) >= 19 and timestamp[10] in ("T", " "):
+        return timestamp[11:19]
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%H:%M:%S")
+    except Exception:  # noqa: BLE001
+        return timestamp
+
+
+@lru_cache(maxsize=16)
+def _cancelled_info_body(user_message: str, word_count: int, time_str: str) -> Group:
+    details = Text.from_markup(
+        "".join((_CANCELLED_PREFIX, user_message, _CANCELLED_MID1, str(word_count), _CANCELLED_MID2, time_str))
+    )
+    return Group(details, _ACTIONS_TEXT)
+
+
+# Shared by every progress bar; the spinner keeps its own start time, so it
+# is created per bar in create_progress_bar.
+@lru_cache(maxsize=None)
+def _progress_columns() -> Tuple[Any, ...]:
+    from rich.progress import (
+        BarColumn,
+        MofNCompleteColumn,
+        TaskProgressColumn,
+        TextColumn,
+        TimeElapsedColumn,
+    )
+
+    return (
+        TextColumn("[bold blue]{task.description}"),
+        BarColumn(bar_width=None),
+        TaskProgressColumn(),
+        MofNCompleteColumn(),
+        TextColumn("•"),
+        TimeElapsedColumn(),
+    )
+
+
+# Rendered Markdown keyed by a digest of the source text.
+MARKDOWN_CACHE_MAX = 128
+
+# Anything Markdown could turn into more than a plain paragraph: inline and
+# block sigils, HTML/entities, escapes, line breaks, and leading indentation,
+# list, heading-underline or numbered-list starts.
+_MD_SIGILS_RE = re.compile(r"[#*_`\[\]>~|<&\\\n\r]|^\s|\s$|^[-+=\d]")
+
+# Renders no lines, like Markdown of empty or whitespace-only text.
+_EMPTY_RENDERABLE = Group()
+
+
+def _content_key(text: str) -> bytes:
+    # Stable across processes (unlike hash()) and cheap for long text.
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _build_markdown(text: str) -> Markdown:
+    from rich.markdown import Markdown
+
+    return Markdown(text)
+
+
+_HOME_DIR = os.path.expanduser("~")
+_HOME_PREFIX_LEN = len(_HOME_DIR) + 1
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+_SYNTAX_KWARGS: Dict[str, Any] = {"theme": "vim", "line_numbers": True, "indent_guides": True}
+
+
+# Resolving a lexer by name scans Pygments' registry; Syntax accepts the
+# instance directly, so each language is resolved once.
+@lru_cache(maxsize=64)
+def _syntax_lexer(lang: str) -> Union[Lexer, str]:
+    try:
+        return get_lexer_by_name(lang, stripnl=False, ensurenl=True, tabsize=4)
+    except ClassNotFound:
+        return lang
+
+
+# Line breaks and tabs would break the one-line context table rows.
+_NL_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
+# Commands whose output is rendered as a file table.
+_LS_BASE_CMDS = frozenset(Config.LS_COMMANDS) | {"ls"}
+
+# First column of `ls -l` output: file-type character plus permission bits.
+_TYPE_CHARS = frozenset("-dlbcsp")
+_PERM_STRIP = str.maketrans("", "", "rwx-")
+
+
+# ls output repeats a handful of extensions, so the lookup is cached per suffix.
+@lru_cache(maxsize=256)
+def _ext_to_type(ext: str) -> str:
+    return Config.FILE_EXTENSIONS.get('.' + ext.lower(), 'file')
+
+
+def _with_footer(method: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(method)
+    def wrapper(self: UIManager, *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        if self._pending_footer:
+            self.console.print(f"[dim]{self._pending_footer}[/dim]")
+            self._pending_footer = None
+        return result
+
+    return wrapper
+
+
+class _ProgressPool:
+    # One Progress (and its columns) is reused for every progress_task; its
+    # live display only runs while at least one task is active, so it never
+    # overlaps the prompt.
     def __init__(self, console: Console) -> None:
-        self.console = console
-        self._pending_footer = None
+        self._console = console
+        self._progress: Optional[Progress] = None
+        self._active = 0
 
-    def get_prompt_text(self, mode: str) -> FormattedText:
-        os_icon = "" if os.name != "nt" else ""
-        folder_icon = ""
+    def acquire(self, description: str) -> Tuple[Progress, TaskID]:
+        if self._progress is None:
+            from rich.progress import Progress, SpinnerColumn
 
-        path_display = self._format_path_for_prompt(os.getcwd())
+            self._progress = Progress(
+                SpinnerColumn("point"), *_progress_columns(), console=self._console, transient=False
+            )
+        if not self._active:
+            self._progress.start()
+        self._active += 1
+        return self._progress, self._progress.add_task(description, total=None)
+
+    def release(self, task_id: TaskID) -> None:
+        progress = self._progress
+        if progress is None:
+            return
+        self._active -= 1
+        if not self._active:
+            # Stop first so the last frame, including this task, stays on screen.
+            progress.stop()
+        progress.remove_task(task_id)
 
-        env_segments = []
-        if mode == "ai":
-            env_segments.append("<mode_ai>AI</mode_ai>")
-        for style_name, text in get_prompt_env_indicators():
-            tag = style_name.split(":", 1)[1] if style_name.startswith("class:") else style_name
-            env_segments.append(f"<{tag}>{text}</{tag}>")
 
-        env_html_str = " ".join(env_segments)
-        env_html_str = f" {env_html_str}" if env_html_str else ""
+class UIManager:
+    _STYLE_CACHE: ClassVar[Optional[Style]] = None
 
-        top_left_str = (
-            "<prompt_border>╭─</prompt_border> "
-            f"<prompt_os>{os_icon}</prompt_os> "
-            f"<prompt_folder>{folder_icon}</prompt_folder> "
-            f"<path>{path_display}</path>"
-        )
+    def __init__(self, console: Console) -> None:
+        self.console = console
+        self._pending_footer: Optional[str] = None
+        self._last_cwd: Optional[Tuple[str, str]] = None
+        self._markdown_cache: "OrderedDict[bytes, RenderableType]" = OrderedDict()
+        self._progress_pool = _ProgressPool(console)
 
-        top_left_html = HTML(top_left_str)
-        top_left_ft = to_formatted_text(top_left_html)
+    def get_prompt_text(self, mode: str) -> FormattedText:
+        os_icon = "" if os.name != "nt" else ""
+        cwd = os.getcwd()
+        if self._last_cwd is not None and self._last_cwd[0] == cwd:
+            path_display = self._last_cwd[1]
+        else:
+            path_display = self._format_path_for_prompt(cwd)
+            self._last_cwd = (cwd, path_display)
 
-        env_html = HTML(env_html_str) if env_html_str else None
-        env_ft = to_formatted_text(env_html) if env_html else []
+        top_left_ft = _top_left_fragments(os_icon, path_display)
+        env_ft = _env_fragments(mode == "ai", tuple(get_prompt_env_indicators()))
 
         try:
             total_width = get_app().output.get_size().columns
         except Exception:
             total_width = 100
 
-        used_width = fragment_list_width(top_left_ft) + (fragment_list_width(env_ft) if env_html else 0)
+        used_width = fragment_list_width(list(top_left_ft)) + fragment_list_width(list(env_ft))
         padding_calc = total_width - used_width
-        if env_html:
+        if env_ft:
             padding_width = padding_calc if padding_calc > 0 else 1 if padding_calc == 0 else 0
         else:
             padding_width = padding_calc if padding_calc > 0 else 0
-        padding_html = HTML(f"<prompt_padding>{'─' * padding_width}</prompt_padding>")
 
-        prompt_symbol = HTML("<prompt_symbol>❯</prompt_symbol> ")
-        bottom_html = HTML("<prompt_border>╰─</prompt_border>")
-
-        parts = [top_left_html, padding_html]
-        if env_html:
-            parts.append(env_html)
-        parts.extend(["\n", bottom_html, prompt_symbol])
-
-        return merge_formatted_text(parts)
+        return FormattedText(
+            [
+                *top_left_ft,
+                ("class:prompt_padding", "─" * padding_width),
+                *env_ft,
+                *_PROMPT_TAIL_FT,
+            ]
+        )
 
     def get_style(self) -> Style:
-        environment_styles = {
-            "env_python": "#99d1db bold",
-            "env_git": "#ef9f76 bold",
-            "env_node": "#cba6f7 bold",
-            "env_docker": "#81c8be bold",
-            "env_system": "#e5c890 bold",
-        }
-
-        combined_styles = {
-            **Config.PROMPT_STYLES,
-            **Config.COMPLETION_STYLES,
-            **environment_styles,
-        }
-        return Style.from_dict(combined_styles)
+        # Config styles are fixed once the config is loaded at import time.
+        if UIManager._STYLE_CACHE is None:
+            UIManager._STYLE_CACHE = Style.from_dict(
+                {
+                    **Config.PROMPT_STYLES,
+                    **Config.COMPLETION_STYLES,
+                    **_ENVIRONMENT_STYLES,
+                }
+            )
+        return UIManager._STYLE_CACHE
 
+    @_with_footer
     def display_memory_status(self, stats: dict) -> None:
         status_table = Table(show_header=False, box=None, padding=(0, 1))
         status_table.add_row("Configured", "Yes" if stats.get("configured") else "No")
@@ -128,10 +319,8 @@ class UIManager:
         self.console.print(
             Panel.fit(status_table, title=" Memory Status", border_style="blue")
         )
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_memory_cleared(self, success: bool) -> None:
         if success:
             self.console.print(
@@ -149,49 +338,37 @@ class UIManager:
                     border_style="red",
                 )
             )
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_memory_toggle(self, enabled: bool) -> None:
         if enabled:
             self.console.print("[green]Memory recording enabled.[/green]")
         else:
             self.console.print("[yellow]Memory recording disabled.[/yellow]")
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_memory_topk(self, value: int) -> None:
         self.console.print(f"[cyan]Memory retrieval top-k set to {value}.[/cyan]")
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_memory_error(self, message: str) -> None:
         self.console.print(f"[red]Memory: {message}[/red]")
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_router_diagnostics(self, lines: List[str]) -> None:
         if not lines:
             return
 
         for line in lines:
             self.console.print(line)
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
-    def display_persona_renderable(self, renderable) -> None:
+    @_with_footer
+    def display_persona_renderable(self, renderable: Optional[RenderableType]) -> None:
         if renderable is None:
             return
         self.console.print(renderable)
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def display_search_results(self, payload: dict) -> None:
         status = payload.get("status", "success")
         if status != "success":
@@ -224,19 +401,21 @@ class UIManager:
             if domain:
                 label += f" [dim]({domain})[/dim]"
 
-            node = tree.add(label)
-
+            # One node per result; details sit under the title as extra lines
+            # instead of child nodes.
             date = item.get("date")
-            if date:
-                node.add(f"[green]Date:[/green] {date}")
-
             snippet = item.get("snippet")
-            if snippet:
-                node.add(f"[white]{snippet}[/white]")
-
             link = item.get("link")
-            if link:
-                node.add(f"[cyan]{link}[/cyan]")
+            details = [
+                detail
+                for detail in (
+                    f"[green]Date:[/green] {date}" if date else None,
+                    f"[white]{snippet}[/white]" if snippet else None,
+                    f"[cyan]{link}[/cyan]" if link else None,
+                )
+                if detail
+            ]
+            tree.add("\n".join([label, *details]))
 
         debug = payload.get("debug", {})
         latency = payload.get("searchParameters", {}).get("latency_ms")
@@ -246,23 +425,19 @@ class UIManager:
             tree.add(f"[dim]Results: {debug.get('result_count')}[/dim]")
 
         self.console.print(tree)
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
     def _format_path_for_prompt(self, path: str) -> str:
         try:
-            current_path = os.path.abspath(path)
+            # os.getcwd() is already absolute and normalized.
+            current_path = path if os.path.isabs(path) else os.path.abspath(path)
         except OSError:
             return path
 
-        home_dir = os.path.expanduser("~")
-
-        if current_path == home_dir:
+        if current_path == _HOME_DIR:
             return "~"
 
-        if current_path.startswith(home_dir):
-            relative = current_path[len(home_dir) + 1 :]
+        if current_path.startswith(_HOME_DIR):
+            relative = current_path[_HOME_PREFIX_LEN:]
             if not relative:
                 return "~"
 
@@ -274,96 +449,86 @@ class UIManager:
 
         return current_path
 
+    @_with_footer
     def show_welcome(self) -> None:
         env_info = get_all_env_info()
 
-        welcome_parts: List[str] = [Config.WELCOME_MESSAGE]
-
         env_summary: List[str] = []
-        if env_info.get("python"):
-            py_env = env_info["python"]
+        py_env = env_info.get("python")
+        if py_env:
             env_summary.append(
                 f"󰌠 Python: {py_env['display']} (v{py_env['python_version']})"
             )
 
-        if env_info.get("git"):
-            git_info = env_info["git"]
+        git_info = env_info.get("git")
+        if git_info:
             status_indicator = "" if git_info.get("has_changes") else ""
             env_summary.append(f" Git: {git_info['branch']} {status_indicator}")
 
-        if env_info.get("node"):
-            node_info = env_info["node"]
+        node_info = env_info.get("node")
+        if node_info:
             env_summary.append(
                 f"󰎙 Node: {node_info['name']} (v{node_info['version']})"
             )
 
-        if env_info.get("docker"):
-            docker_info = env_info["docker"]
+        docker_info = env_info.get("docker")
+        if docker_info:
             env_summary.append(f"󰡨 Docker: {docker_info['display']}")
 
-        if env_summary:
-            welcome_parts.append("\n\n Detected Environments:")
-            welcome_parts.extend([f"  {item}" for item in env_summary])
-
-        welcome_panel = PanelTheme.build("\n".join(welcome_parts), style="info", fit=True)
+        welcome_text = "\n".join(
+            chain(
+                (Config.WELCOME_MESSAGE,),
+                ("\n\n Detected Environments:",) if env_summary else (),
+                (f"  {item}" for item in env_summary),
+            )
+        )
+        welcome_panel = PanelTheme.build(welcome_text, style="info", fit=True)
         self.console.print(welcome_panel)
         self.console.print()
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def show_help(self) -> None:
-        keybindings_lines = ["[bold]Keybindings[/bold]"]
-        for keybind, description in Config.HELP_KEYBINDS:
-            keybindings_lines.append(f"  • [cyan]{keybind}[/cyan] – {description}")
-        keybindings_lines.append("  • [cyan]Alt+Z[/cyan] – Resume cancelled AI stream")
-
-        commands_lines = ["\n[bold]Special Commands[/bold]"]
-        for command, mode, description in Config.HELP_SPECIAL_COMMANDS:
-            commands_lines.append(
-                f"  • [cyan]{command}[/cyan] ({mode}) – {description}"
+        help_text = "\n".join(
+            chain(
+                ("[bold]Keybindings[/bold]",),
+                (
+                    f"  • [cyan]{keybind}[/cyan] – {description}"
+                    for keybind, description in Config.HELP_KEYBINDS
+                ),
+                (
+                    "  • [cyan]Alt+Z[/cyan] – Resume cancelled AI stream",
+                    "\n[bold]Special Commands[/bold]",
+                ),
+                (
+                    f"  • [cyan]{command}[/cyan] ({mode}) – {description}"
+                    for command, mode, description in Config.HELP_SPECIAL_COMMANDS
+                ),
+                (
+                    "  • [cyan]memory status[/cyan] (Shell) – Show memory statistics",
+                    "  • [cyan]memory enable[/cyan] (Shell) – Enable memory recording",
+                    "  • [cyan]memory disable[/cyan] (Shell) – Disable memory recording",
+                    "  • [cyan]memory topk <n>[/cyan] (Shell) – Set retrieval top-k",
+                    "  • [cyan]resume[/cyan] (AI) – Resume cancelled AI response",
+                    "  • [cyan]cancelstate[/cyan] (AI) – Show cancelled stream details",
+                    "\n[bold]Environment Commands[/bold]",
+                    "  • [cyan]!env[/cyan] – Show current environment status",
+                    "  • [cyan]!status[/cyan] – Show detailed system and environment info",
+                    "  • [cyan]!git[/cyan] – Show git repository information",
+                    "  • [cyan]!python[/cyan] – Show Python environment details",
+                ),
             )
-        commands_lines.extend(
-            [
-                "  • [cyan]memory status[/cyan] (Shell) – Show memory statistics",
-                "  • [cyan]memory enable[/cyan] (Shell) – Enable memory recording",
-                "  • [cyan]memory disable[/cyan] (Shell) – Disable memory recording",
-                "  • [cyan]memory topk <n>[/cyan] (Shell) – Set retrieval top-k",
-                "  • [cyan]resume[/cyan] (AI) – Resume cancelled AI response",
-                "  • [cyan]cancelstate[/cyan] (AI) – Show cancelled stream details",
-            ]
-        )
-
-        env_lines = ["\n[bold]Environment Commands[/bold]"]
-        env_lines.extend(
-            [
-                "  • [cyan]!env[/cyan] – Show current environment status",
-                "  • [cyan]!status[/cyan] – Show detailed system and environment info",
-                "  • [cyan]!git[/cyan] – Show git repository information",
-                "  • [cyan]!python[/cyan] – Show Python environment details",
-            ]
         )
 
-        help_text = "\n".join(keybindings_lines + commands_lines + env_lines)
-
         self.console.print()
         self.console.print(PanelTheme.build(help_text, title="Help", style="info", fit=True))
         self.console.print()
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
     def show_mode_switch(self, mode_name: str) -> None:  # noqa: D401
         """Tampilkan perubahan mode (dikosongkan untuk menghindari clutter)."""
 
         return
 
+    @_with_footer
     def show_context_cleared(self) -> None:
         self.console.print(
             PanelTheme.build(
@@ -372,13 +537,8 @@ class UIManager:
                 style="success",
             )
         )
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
+    @_with_footer
     def show_conversation_cleared(self) -> None:
         self.console.print(
             PanelTheme.build(
@@ -387,12 +547,6 @@ class UIManager:
                 style="success",
             )
         )
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
     def show_context_table(self, shell_context: list) -> None:
         if not shell_context:
@@ -414,39 +568,31 @@ class UIManager:
         context_table.add_column("Output Preview", style="white")
 
         for entry in shell_context[-Config.CONTEXT_FOR_AI :]:
-            output_preview = (
-                entry["output"][:50] + "..."
-                if len(entry["output"]) > 50
-                else entry["output"]
-            )
-            output_preview = output_preview.replace("\n", " ")
+            output = entry["output"]
+            output_preview = output if len(output) <= 50 else output[:50] + "..."
+            output_preview = output_preview.translate(_NL_TABLE)
 
             context_table.add_row(
                 entry["timestamp"],
                 entry["command"],
-                entry["cwd"].split("/")[-1],
+                os.path.basename(entry["cwd"]),
                 output_preview,
             )
 
         self.console.print(PanelTheme.build(context_table, title="Shell Context", style="info"))
 
-    def display_shell_output(self, command: str, result) -> None:
-        base_cmd = command.strip().split()[0]
-        if self._should_use_ls_table(command, base_cmd):
-            self._display_ls_table(command, result)
-            if self._pending_footer:
-                self.console.print(f"[dim]{self._pending_footer}[/dim]")
-                self._pending_footer = None
+    @_with_footer
+    def display_shell_output(self, command: str, result: subprocess.CompletedProcess) -> None:
+        parts = command.split()
+        base_cmd = parts[0] if parts else ""
+        if base_cmd in _LS_BASE_CMDS:
+            self._display_ls_table(command, parts, result)
             return
 
         output = result.stdout + result.stderr
 
         if result.stdout and result.stderr:
-            combined_output = Text()
-            if result.stdout:
-                combined_output.append(result.stdout, style="white")
-            if result.stderr:
-                combined_output.append(result.stderr, style="red")
+            combined_output = Text.assemble((result.stdout, "white"), (result.stderr, "red"))
 
             self.console.print(
                 PanelTheme.build(
@@ -457,7 +603,7 @@ class UIManager:
                 )
             )
         elif result.stdout:
-            syntax_content = self._try_syntax_highlighting(command, result.stdout)
+            syntax_content = self._try_syntax_highlighting(command, base_cmd, result.stdout)
             self.console.print(
                 PanelTheme.build(
                     syntax_content,
@@ -485,20 +631,7 @@ class UIManager:
                 )
             )
 
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-
-    def _should_use_ls_table(self, command: str, base_cmd: str) -> bool:
-        if base_cmd in Config.LS_COMMANDS:
-            return True
-
-        if base_cmd == "ls" or command.startswith("ls "):
-            return True
-
-        return False
-
-    def _display_ls_table(self, command: str, result) -> None:
+    def _display_ls_table(self, command: str, parts: List[str], result: subprocess.CompletedProcess) -> None:
         if result.returncode != 0:
             self.console.print(
                 PanelTheme.build(
@@ -520,7 +653,7 @@ class UIManager:
             return
 
         try:
-            ls_table = self._create_ls_table(command, result.stdout)
+            ls_table = self._create_ls_table(command, parts, result.stdout)
             self.console.print(
                 PanelTheme.build(
                     ls_table,
@@ -539,7 +672,7 @@ class UIManager:
                 )
             )
 
-    def _create_ls_table(self, command: str, ls_output: str) -> Table:
+    def _create_ls_table(self, command: str, parts: List[str], ls_output: str) -> Table:
         table = Table(show_header=True, header_style="bold cyan", box=None)
 
         lines = ls_output.strip().split("\n")
@@ -559,7 +692,8 @@ class UIManager:
             table.add_column("Size", style="cyan", justify="right")
             table.add_column("Modified", style="yellow")
 
-        target_dir = self._extract_target_directory(command)
+        target_dir = self._extract_target_directory(parts)
+        entries = {} if has_details else self._scan_entries(target_dir)
         for line in lines:
             line = line.strip()
             if not line or line.startswith("total "):
@@ -569,7 +703,7 @@ class UIManager:
                 if has_details:
                     self._add_detailed_row(table, line, target_dir)
                 else:
-                    self._add_simple_row(table, line, target_dir)
+                    self._add_simple_row(table, line, target_dir, entries.get(line))
             except Exception:  # noqa: BLE001
                 continue
 
@@ -580,9 +714,14 @@ class UIManager:
             return True
 
         detailed_patterns = 0
-        for line in lines[:5]:
-            line = line.strip()
-            if not line or line.startswith("total"):
+        non_empty_lines = 0
+        for index, raw_line in enumerate(lines):
+            line = raw_line.strip()
+            if not line:
+                continue
+            if not raw_line.startswith("total"):
+                non_empty_lines += 1
+            if index >= 5 or line.startswith("total"):
                 continue
 
             parts = line.split()
@@ -590,18 +729,16 @@ class UIManager:
                 first_part = parts[0]
                 if (
                     len(first_part) == 10
-                    and first_part[0] in "-dlbcsp"
-                    and all(c in "rwx-" for c in first_part[1:])
+                    and first_part[0] in _TYPE_CHARS
+                    and not first_part[1:].translate(_PERM_STRIP)
                 ):
                     detailed_patterns += 1
 
-        non_empty_lines = len([l for l in lines if l.strip() and not l.startswith("total")])
         return detailed_patterns > 0 and (
             detailed_patterns / max(non_empty_lines, 1)
         ) > 0.5
 
-    def _extract_target_directory(self, command: str) -> str:
-        parts = command.split()
+    def _extract_target_directory(self, parts: List[str]) -> str:
         for part in parts[1:]:
             if not part.startswith("-"):
                 if os.path.isabs(part):
@@ -644,21 +781,42 @@ class UIManager:
             f"[{color}]{icon} {name}[/{color}]",
         )
 
-    def _add_simple_row(self, table: Table, filename: str, current_dir: str) -> None:
+    @staticmethod
+    def _scan_entries(target_dir: str) -> Dict[str, os.DirEntry]:
+        # One directory read gives every row its type bits and a cached stat.
+        try:
+            with os.scandir(target_dir) as iterator:
+                return {entry.name: entry for entry in iterator}
+        except OSError:
+            return {}
+
+    @staticmethod
+    def _stat_or_none(file_path: str, entry: Optional[os.DirEntry]) -> Optional[os.stat_result]:
+        # Follows symlinks like os.path.exists; a missing target reads as absent.
+        try:
+            return entry.stat() if entry is not None else os.stat(file_path)
+        except OSError:
+            return None
+
+    def _add_simple_row(
+        self,
+        table: Table,
+        filename: str,
+        current_dir: str,
+        entry: Optional[os.DirEntry] = None,
+    ) -> None:
         file_path = os.path.join(current_dir, filename)
-        _, icon, color = self._get_file_info(filename, current_dir)
+        _, icon, color = self._get_file_info(filename, current_dir, entry=entry)
 
         size = "-"
         mtime = "?"
 
         try:
-            if os.path.exists(file_path):
-                stat_info = os.stat(file_path)
-                if not os.path.isdir(file_path):
+            stat_info = self._stat_or_none(file_path, entry)
+            if stat_info is not None:
+                if not stat.S_ISDIR(stat_info.st_mode):
                     size = self._format_size(stat_info.st_size)
-                else:
-                    size = "-"
-                mtime = datetime.fromtimestamp(stat_info.st_mtime).strftime("%b %d %H:%M")
+                mtime = time.strftime("%b %d %H:%M", time.localtime(stat_info.st_mtime))
         except (OSError, PermissionError, FileNotFoundError):
             size = "?"
             mtime = "?"
@@ -670,7 +828,13 @@ class UIManager:
             f"[yellow]{mtime}[/yellow]",
         )
 
-    def _get_file_info(self, filename: str, current_dir: str, permissions: str | None = None):
+    def _get_file_info(
+        self,
+        filename: str,
+        current_dir: str,
+        permissions: str | None = None,
+        entry: Optional[os.DirEntry] = None,
+    ) -> Tuple[str, str, str]:
         file_path = os.path.join(current_dir, filename)
 
         is_hidden = filename.startswith('.')
@@ -685,6 +849,19 @@ class UIManager:
                     file_type = 'executable'
                 else:
                     file_type = self._get_file_type_by_extension(filename)
+            elif entry is not None:
+                if entry.is_dir():
+                    file_type = 'directory'
+                elif entry.is_symlink():
+                    # A dangling link is typed by name, as os.path.exists() would have it.
+                    if os.path.exists(entry.path):
+                        file_type = 'symlink'
+                    else:
+                        file_type = self._get_file_type_by_extension(filename)
+                elif os.access(entry.path, os.X_OK):
+                    file_type = 'executable'
+                else:
+                    file_type = self._get_file_type_by_extension(filename)
             elif os.path.exists(file_path):
                 if os.path.isdir(file_path):
                     file_type = 'directory'
@@ -716,40 +893,32 @@ class UIManager:
         return file_type, icon, color
 
     def _get_file_type_by_extension(self, filename: str) -> str:
-        if not filename or (filename.startswith('.') and '.' not in filename[1:]):
+        head, sep, tail = filename.rpartition('.')
+        if not sep or not head:  # "Makefile", ".bashrc"
             return 'file'
+        return _ext_to_type(tail)
 
-        ext = '.' + filename.split('.')[-1].lower() if '.' in filename else ''
-        return Config.FILE_EXTENSIONS.get(ext, 'file')
-
-    def _format_size(self, size_bytes) -> str:
+    def _format_size(self, size_bytes: Union[int, str]) -> str:
         try:
             size_bytes = int(size_bytes)
         except (ValueError, TypeError):
             return str(size_bytes)
 
-        if size_bytes == 0:
-            return "0 B"
+        if size_bytes < 1024:
+            return f"{size_bytes} B"
 
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
+        # Each unit is 10 bits wide, so the unit index falls out of bit_length.
+        i = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_NAMES) - 1)
+        return f"{size_bytes / (1 << (10 * i)):.1f} {_SIZE_NAMES[i]}"
 
-        if i == 0:
-            return f"{size_bytes} {size_names[i]}"
-        return f"{size_bytes:.1f} {size_names[i]}"
-
-    def _try_syntax_highlighting(self, command: str, output: str):
-        base_cmd = command.split()[0]
+    def _try_syntax_highlighting(self, command: str, base_cmd: str, output: str) -> Union[Syntax, str]:
         if base_cmd not in Config.SYNTAX_HIGHLIGHT_COMMANDS:
             return output
 
         for ext, lang in Config.SYNTAX_EXTENSIONS.items():
             if ext in command:
                 try:
-                    return Syntax(output, lang, theme="vim", line_numbers=True, indent_guides=True)
+                    return Syntax(output, _syntax_lexer(lang), **_SYNTAX_KWARGS)
                 except Exception:  # noqa: BLE001
                     break
 
@@ -783,6 +952,7 @@ class UIManager:
         tree.add("[cyan]Use Ctrl+C or app's exit command to return to shell[/cyan]")
         self.console.print(tree)
 
+    @_with_footer
     def display_interactive_end(self, command: str, return_code: int) -> None:
         if return_code == 0:
             tree = Tree(
@@ -796,9 +966,6 @@ class UIManager:
                 guide_style="dim",
             )
             self.console.print(tree)
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
 
     def display_interrupt(self, message: str = "^C - Command interrupted") -> None:
         self.console.print(
@@ -826,69 +993,71 @@ class UIManager:
 
 [dim]Partial response has been saved for resume[/dim]"""
 
-        self.console.print(
-            PanelTheme.build(
-                notification_text,
-                title=" Stream Cancelled",
-                style="warning",
-                padding=(1, 2),
-            )
-        )
-        if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
-            self._pending_footer = None
-
-    def show_cancelled_stream_info(self, state_info: dict) -> None:
-        user_message = state_info["user_message"]
-        word_count = state_info["partial_word_count"]
-        timestamp = state_info["timestamp"]
-
-        try:
-            dt = datetime.fromisoformat(timestamp)
-            time_str = dt.strftime("%H:%M:%S")
-        except Exception:  # noqa: BLE001
-            time_str = timestamp
-
-        info_text = f"""[cyan]Cancelled Stream Details:[/cyan]
-
-[bold]Original Question:[/bold] {user_message}
-[bold]Partial Words:[/bold] {word_count}
-[bold]Cancelled At:[/bold] {time_str}
+        self._flush_panel(notification_text, title=" Stream Cancelled", style="warning")
 
-[green]Available Actions:[/green]
-• [bold]resume[/bold] - Continue from where it stopped
-• [bold]Alt+Z[/bold] - Quick resume via keybinding
-• [bold]clear[/bold] - Clear this cancelled state"""
+    def show_cancelled_stream_info(self, state_info: Union[CancelledStreamState, Dict[str, Any]]) -> None:
+        if isinstance(state_info, dict):
+            state_info = CancelledStreamState(**state_info)
+        user_message = state_info.user_message
+        word_count = state_info.partial_word_count
+        time_str = _iso_to_hms(state_info.timestamp)
 
-        self.console.print(
-            PanelTheme.build(
-                info_text,
-                title=" Cancelled Stream State",
-                style="info",
-                padding=(1, 2),
-            )
+        self._flush_panel(
+            _cancelled_info_body(user_message, word_count, time_str),
+            title=" Cancelled Stream State",
+            style="info",
         )
+
+    def _flush_panel(
+        self,
+        body: RenderableType,
+        *,
+        title: str,
+        style: str,
+        padding: Tuple[int, int] = (1, 2),
+    ) -> None:
+        # Panel and pending footer go out in a single print.
+        panel = PanelTheme.build(body, title=title, style=style, padding=padding)
+        renderable: RenderableType = panel
         if self._pending_footer:
-            self.console.print(f"[dim]{self._pending_footer}[/dim]")
+            footer = self.console.render_str(f"[dim]{self._pending_footer}[/dim]")
+            renderable = Group(panel, footer)
             self._pending_footer = None
 
+        self.console.print(renderable)
+
     @staticmethod
     def create_progress_bar(description: str) -> Progress:
-        progress = Progress(
-            SpinnerColumn("point"),
-            TextColumn("[bold blue]{task.description}"),
-            BarColumn(bar_width=None),
-            TaskProgressColumn(),
-            MofNCompleteColumn(),
-            TextColumn("•"),
-            TimeElapsedColumn(),
-            transient=False,
-        )
+        from rich.progress import Progress, SpinnerColumn
+
+        progress = Progress(SpinnerColumn("point"), *_progress_columns(), transient=False)
         progress.add_task(description, total=None)
         return progress
 
-    def render_markdown(self, content: str):
+    @contextmanager
+    def progress_task(self, description: str) -> Iterator[Tuple[Progress, TaskID]]:
+        progress, task_id = self._progress_pool.acquire(description)
         try:
-            return Markdown(content)
-        except Exception:  # noqa: BLE001
+            yield progress, task_id
+        finally:
+            self._progress_pool.release(task_id)
+
+    def render_markdown(self, content: str) -> RenderableType:
+        if not isinstance(content, str):
+            return Text(str(content), overflow="fold")
+        if not content or content.isspace():
+            return _EMPTY_RENDERABLE
+        if not _MD_SIGILS_RE.search(content):
             return Text(content, overflow="fold")
+
+        key = _content_key(content)
+        cached = self._markdown_cache.get(key)
+        if cached is not None:
+            self._markdown_cache.move_to_end(key)
+            return cached
+
+        renderable = _build_markdown(content)
+        self._markdown_cache[key] = renderable
+        while len(self._markdown_cache) > MARKDOWN_CACHE_MAX:
+            self._markdown_cache.popitem(last=False)
+        return renderable
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from __future__ import annotations
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Callable, Iterable, Optional
 import os
@@ -19,13 +20,21 @@ import signal
 from rich.align import Align
 from rich.console import Console
 from rich.live import Live
-from rich.markdown import Markdown
 from rich.text import Text
 
 from .theme import PanelTheme
 from ..config import Config
 
 
+@dataclass(frozen=True)
+class CancelledStreamState:
+    __slots__ = ("user_message", "partial_word_count", "timestamp")
+
+    user_message: str
+    partial_word_count: int
+    timestamp: str
+
+
 class LiveMarkdownStreamRenderer:
     def __init__(self, console: Console, max_visible_lines: int = 10) -> None:
         self.console = console
@@ -34,18 +43,34 @@ class LiveMarkdownStreamRenderer:
         self.full_content: str = ""
         self.current_line: str = ""
         self.word_count = 0
+        self._in_word = False
 
     def reset(self) -> None:
         self.rolling_buffer = []
         self.full_content = ""
         self.current_line = ""
         self.word_count = 0
+        self._in_word = False
+
+    def restore(self, content: str) -> None:
+        self.full_content = content
+        self.current_line = ""
+        self.word_count = len(content.split())
+        self._in_word = bool(content) and not content[-1].isspace()
 
     def add_chunk(self, chunk: str) -> None:
+        if not chunk:
+            return
+
         self.full_content += chunk
         self.current_line += chunk
 
-        self.word_count = len(self.full_content.split())
+        # Count only the new chunk; a word split across chunks is counted once.
+        words = len(chunk.split())
+        if words and self._in_word and not chunk[0].isspace():
+            words -= 1
+        self.word_count += words
+        self._in_word = not chunk[-1].isspace()
 
         if "\n" in self.current_line:
             lines = self.current_line.split("\n")
@@ -57,6 +82,8 @@ class LiveMarkdownStreamRenderer:
             self.rolling_buffer = self.rolling_buffer[-self.max_visible_lines :]
 
     def get_streaming_content(self):
+        from rich.markdown import Markdown
+
         display_lines = self.rolling_buffer.copy()
         if self.current_line:
             display_lines.append(self.current_line + "▊")
@@ -72,6 +99,8 @@ class LiveMarkdownStreamRenderer:
             return Text(buffer_content, overflow="fold")
 
     def get_final_content(self):
+        from rich.markdown import Markdown
+
         try:
             return Markdown(self.full_content)
         except Exception:  # noqa: BLE001
@@ -93,6 +122,8 @@ class StreamingContentRenderer:
         if not self.content:
             return Text(" Waiting for response...")
 
+        from rich.markdown import Markdown
+
         if "```" in self.content:
             try:
                 return Markdown(self.content)
@@ -257,15 +288,15 @@ class StreamingUIManager:
     def clear_cancelled_state(self) -> None:
         self.cancelled_stream_state = None
 
-    def get_cancelled_state_info(self) -> Optional[dict]:
+    def get_cancelled_state_info(self) -> Optional[CancelledStreamState]:
         if not self.has_cancelled_stream():
             return None
 
-        return {
-            "user_message": self.cancelled_stream_state["user_message"],
-            "partial_word_count": self.cancelled_stream_state["word_count"],
-            "timestamp": self.cancelled_stream_state["timestamp"],
-        }
+        return CancelledStreamState(
+            user_message=self.cancelled_stream_state["user_message"],
+            partial_word_count=self.cancelled_stream_state["word_count"],
+            timestamp=self.cancelled_stream_state["timestamp"],
+        )
 
     def stream_ai_response_with_resume(
         self,
@@ -298,9 +329,7 @@ class StreamingUIManager:
         original_messages = saved_state["messages"]
 
         self.markdown_renderer.reset()
-        self.markdown_renderer.full_content = partial_content
-        self.markdown_renderer.current_line = ""
-        self.markdown_renderer.word_count = len(partial_content.split())
+        self.markdown_renderer.restore(partial_content)
 
         with Live(console=self.console, refresh_per_second=12) as live:
             try:
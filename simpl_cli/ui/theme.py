@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 from rich.panel import Panel
 from rich.text import Text
 from ..config import Config
@@ -15,9 +15,20 @@ class PanelStyle:
 
 
 class PanelTheme:
+    # style name -> (resolved style, base Panel kwargs); Config.PANEL_STYLES is
+    # final once the config has been loaded at import time.
+    _cache: Dict[str, Tuple[PanelStyle, Dict[str, Any]]] = {}
 
     @staticmethod
     def get_style(name: str) -> PanelStyle:
+        return PanelTheme._resolve(name)[0]
+
+    @staticmethod
+    def _resolve(name: str) -> Tuple[PanelStyle, Dict[str, Any]]:
+        cached = PanelTheme._cache.get(name)
+        if cached is not None:
+            return cached
+
         theme = Config.PANEL_STYLES.get(name, Config.PANEL_STYLES["default"])
         default_theme = Config.PANEL_STYLES["default"]
 
@@ -25,18 +36,19 @@ class PanelTheme:
         padding = theme.get("padding", default_theme.get("padding"))
         title_style = theme.get("title_style")
 
-        return PanelStyle(border_style=border_style, padding=padding, title_style=title_style)
+        panel_style = PanelStyle(border_style=border_style, padding=padding, title_style=title_style)
+        base_kwargs: Dict[str, Any] = {"border_style": border_style, "title_align": "left"}
+        if padding is not None:
+            base_kwargs["padding"] = padding
+
+        cached = PanelTheme._cache[name] = (panel_style, base_kwargs)
+        return cached
 
     @staticmethod
     def build(renderable: Any, title: str | Text = "", style: str = "default", *, fit: bool = False, **overrides: Any) -> Panel:
-        panel_style = PanelTheme.get_style(style)
-
-        panel_kwargs: Dict[str, Any] = {"border_style": panel_style.border_style}
-        if panel_style.padding is not None:
-            panel_kwargs["padding"] = panel_style.padding
+        panel_style, base_kwargs = PanelTheme._resolve(style)
 
-        panel_kwargs.update(overrides)
-        panel_kwargs.setdefault("title_align", "left")
+        panel_kwargs = {**base_kwargs, **overrides}
 
         title_value = title
         if isinstance(title, str) and panel_style.title_style: